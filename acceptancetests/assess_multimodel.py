@@ -15,6 +15,7 @@ from deploy_stack import (
     dump_env_logs,
     get_random_string,
     safe_print_status,
+    wait_for_dummy_stack,
     )
 from jujupy import (
     client_from_config,
@@ -27,15 +28,23 @@ from utility import (
 
 
 def assess_multimodel_deploy(client, charm_series, log_dir, base_env):
-    """Deploy the dummy stack in two hosted environments."""
+    """Deploy the dummy stack in two hosted environments.
+
+    The stacks in all models are deployed before waiting on any of them, so
+    the models come up concurrently rather than one after another.
+    """
     # deploy into system env
-    deploy_dummy_stack(client, charm_series)
+    deploy_dummy_stack(client, charm_series, wait=False, use_bundle=True)
 
     # deploy into hosted envs
     with hosted_environment(client, log_dir, 'env1') as env1_client:
-        deploy_dummy_stack(env1_client, charm_series)
+        deploy_dummy_stack(
+            env1_client, charm_series, wait=False, use_bundle=True)
         with hosted_environment(client, log_dir, 'env2') as env2_client:
-            deploy_dummy_stack(env2_client, charm_series)
+            deploy_dummy_stack(
+                env2_client, charm_series, wait=False, use_bundle=True)
+            for model_client in (client, env1_client, env2_client):
+                wait_for_dummy_stack(model_client)
             # check all the services can talk
             check_services(client)
             check_services(env1_client)
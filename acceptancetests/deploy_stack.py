@@ -10,6 +10,8 @@ except ImportError:
     from contextlib import ExitStack as nested
 import glob
 import logging
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
 import os
 import random
 import re
@@ -19,6 +21,10 @@ import sys
 import time
 import yaml
 import shutil
+try:
+    from shutil import which
+except ImportError:
+    from distutils.spawn import find_executable as which
 
 from chaos import background_chaos
 from jujucharm import (
@@ -66,6 +72,7 @@ from utility import (
     LoggedException,
     PortTimeoutError,
     print_now,
+    temp_yaml_file,
     until_timeout,
     wait_for_port,
 )
@@ -81,8 +88,38 @@ def destroy_environment(client, instance_tag):
         destroy_job_instances(instance_tag)
 
 
-def deploy_dummy_stack(client, charm_series, use_charmstore=False):
-    """"Deploy a dummy stack in the specified environment."""
+def make_dummy_bundle(dummy_source, dummy_sink, charm_series):
+    """Return a bundle dict describing the dummy stack."""
+    return {
+        'services': {
+            'dummy-source': {
+                'charm': dummy_source,
+                'series': charm_series,
+                'num_units': 1,
+                },
+            'dummy-sink': {
+                'charm': dummy_sink,
+                'series': charm_series,
+                'num_units': 1,
+                'expose': True,
+                },
+            },
+        'relations': [['dummy-source', 'dummy-sink']],
+        }
+
+
+def deploy_dummy_stack(client, charm_series, use_charmstore=False,
+                       wait=True, use_bundle=False):
+    """"Deploy a dummy stack in the specified environment.
+
+    :param wait: If False, return as soon as the charms are deployed and
+        leave waiting for the agents to the caller (see
+        wait_for_dummy_stack). This allows several models to bring up their
+        stacks at the same time.
+    :param use_bundle: If True, deploy the stack as a single bundle instead
+        of separate deploy, add-relation and expose commands. Juju 1.x
+        clients do not support native bundles and ignore this.
+    """
     # Centos requires specific machine configuration (i.e. network device
     # order).
     if charm_series.startswith("centos") and client.env.maas:
@@ -102,10 +139,21 @@ def deploy_dummy_stack(client, charm_series, use_charmstore=False):
         dummy_sink = local_charm_path(
             charm='dummy-sink', juju_ver=client.version, series=charm_series,
             platform=platform)
-    client.deploy(dummy_source, series=charm_series)
-    client.deploy(dummy_sink, series=charm_series)
-    client.juju('add-relation', ('dummy-source', 'dummy-sink'))
-    client.juju('expose', ('dummy-sink',))
+    if use_bundle and not isinstance(client, EnvJujuClient1X):
+        bundle = make_dummy_bundle(dummy_source, dummy_sink, charm_series)
+        with temp_yaml_file(bundle) as bundle_path:
+            client.deploy_bundle(bundle_path)
+    else:
+        client.deploy(dummy_source, series=charm_series)
+        client.deploy(dummy_sink, series=charm_series)
+        client.juju('add-relation', ('dummy-source', 'dummy-sink'))
+        client.juju('expose', ('dummy-sink',))
+    if wait:
+        wait_for_dummy_stack(client)
+
+
+def wait_for_dummy_stack(client):
+    """Wait for the agents of a deployed dummy stack to start."""
     if client.env.kvm or client.env.maas:
         # A single virtual machine may need up to 30 minutes before
         # "apt-get update" and other initialisation steps are
@@ -218,6 +266,7 @@ def dump_env_logs_known_hosts(client, artifacts_dir, runtime_config=None,
     else:
         remote_machines = get_remote_machines(client, known_hosts)
 
+        copy_jobs = []
         for machine_id in sorted(remote_machines, key=int):
             remote = remote_machines[machine_id]
             if not _can_run_ssh() and not remote.is_windows():
@@ -229,7 +278,8 @@ def dump_env_logs_known_hosts(client, artifacts_dir, runtime_config=None,
             machine_dir = os.path.join(artifacts_dir,
                                        "machine-%s" % machine_id)
             ensure_dir(machine_dir)
-            copy_remote_logs(remote, machine_dir)
+            copy_jobs.append((remote, machine_dir))
+        copy_remote_logs_concurrently(copy_jobs)
     archive_logs(artifacts_dir)
     retain_config(runtime_config, artifacts_dir)
 
@@ -292,22 +342,86 @@ def iter_remote_machines(client):
             yield machine_id, remote
 
 
+def iter_log_files(log_dir):
+    """Yield the paths of log files in log_dir and its subdirectories.
+
+    Symlinked directories are not followed.
+    """
+    if not hasattr(os, 'scandir'):
+        # Python 2
+        for r, ds, fs in os.walk(log_dir):
+            for f in fs:
+                if is_log(f):
+                    yield os.path.join(r, f)
+        return
+    try:
+        entries = os.scandir(log_dir)
+    except OSError:
+        return
+    try:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                for path in iter_log_files(entry.path):
+                    yield path
+            elif entry.is_symlink() and entry.is_dir():
+                continue
+            elif is_log(entry.name):
+                yield entry.path
+    finally:
+        # Python 3.5 scandir iterators have no close().
+        close = getattr(entries, 'close', None)
+        if close is not None:
+            close()
+
+
 def archive_logs(log_dir):
     """Compress log files in given log_dir using gzip."""
-    log_files = []
-    for r, ds, fs in os.walk(log_dir):
-        log_files.extend(os.path.join(r, f) for f in fs if is_log(f))
+    log_files = list(iter_log_files(log_dir))
     if log_files:
-        subprocess.check_call(['gzip', '--best', '-f'] + log_files)
+        compress_logs(log_files)
+
+
+def _gzip_logs(log_files):
+    subprocess.check_call(['gzip', '--best', '-f'] + log_files)
+
+
+def compress_logs(log_files):
+    """Compress the given log files in place, using all available cores.
+
+    pigz is used when it is installed.  Otherwise the files are split
+    between several concurrent gzip processes.
+    """
+    cores = cpu_count()
+    if which('pigz') is not None:
+        subprocess.check_call(
+            ['pigz', '--best', '-f', '-p', str(cores)] + log_files)
+        return
+    workers = min(cores, len(log_files))
+    if workers <= 1:
+        _gzip_logs(log_files)
+        return
+    chunks = [log_files[i::workers] for i in range(workers)]
+    pool = ThreadPool(workers)
+    try:
+        pool.map(_gzip_logs, chunks)
+    finally:
+        pool.close()
+        pool.join()
 
 
 def is_log(file_name):
     """Check to see if the given file name is the name of a log file."""
-    return file_name.endswith('.log') or file_name.endswith('syslog')
+    return file_name.endswith(('.log', 'syslog'))
 
 
 lxc_template_glob = '/var/lib/juju/containers/juju-*-lxc-template/*.log'
 
+# The maximum number of machines to retrieve logs from at the same time.
+LOG_COPY_CONCURRENCY = 16
+# Printed by the remote log collection command when neither ifconfig nor ip
+# could capture the network state.
+IFCONFIG_FAILED = b'ifconfig-capture-failed'
+
 
 def copy_local_logs(env, directory):
     """Copy logs for all machines in local environment."""
@@ -317,9 +431,32 @@ def copy_local_logs(env, directory):
     log_names.extend(glob.glob(lxc_template_glob))
     try:
         subprocess.check_call(['sudo', 'chmod', 'go+r'] + log_names)
-        subprocess.check_call(['cp'] + log_names + [directory])
     except subprocess.CalledProcessError as e:
-        logging.warning("Could not retrieve local logs: %s", e)
+        logging.warning("Could not allow access to the local logs: %s", e)
+    # Like cp, copy every log that can be read even if some cannot.
+    for log_name in log_names:
+        try:
+            shutil.copy(log_name, directory)
+        except (IOError, OSError) as e:
+            logging.warning("Could not retrieve local log %s: %s",
+                            log_name, e)
+
+
+def copy_remote_logs_concurrently(copy_jobs,
+                                  max_workers=LOG_COPY_CONCURRENCY):
+    """Run copy_remote_logs for each (remote, directory) pair.
+
+    Each machine is an independent host, so up to max_workers of them are
+    copied from at the same time.
+    """
+    if not copy_jobs:
+        return
+    pool = ThreadPool(min(len(copy_jobs), max_workers))
+    try:
+        pool.map(lambda job: copy_remote_logs(*job), copy_jobs)
+    finally:
+        pool.close()
+        pool.join()
 
 
 def copy_remote_logs(remote, directory):
@@ -349,31 +486,37 @@ def copy_remote_logs(remote, directory):
         try:
             wait_for_port(remote.address, 22, timeout=60)
         except PortTimeoutError:
-            logging.warning("Could not dump logs because port 22 was closed.")
+            logging.warning(
+                "Could not dump logs from %r because port 22 was closed.",
+                remote)
             return
 
+        # Capture the network state and make the logs readable using a
+        # single ssh session. The exit status is that of chmod, so a failed
+        # capture is reported on stdout instead.  Newer images may lack
+        # ifconfig, so fall back to ip.
         try:
-            remote.run('sudo chmod -Rf go+r ' + ' '.join(log_paths))
+            output = remote.run(
+                '{ ifconfig || ip addr; } > /home/ubuntu/ifconfig.log 2>&1'
+                ' || echo ' + IFCONFIG_FAILED.decode('ascii') + '; '
+                'sudo chmod -Rf go+r ' + ' '.join(log_paths))
         except subprocess.CalledProcessError as e:
             # The juju log dir is not created until after cloud-init succeeds.
-            logging.warning("Could not allow access to the juju logs:")
-            logging.warning(e.output)
-        try:
-            remote.run('ifconfig > /home/ubuntu/ifconfig.log')
-        except subprocess.CalledProcessError as e:
-            logging.warning("Could not capture ifconfig state:")
-            logging.warning(e.output)
+            # Logs are copied from several hosts at once, so each warning is
+            # a single record naming its host.
+            logging.warning("Could not allow access to the juju logs on %r:"
+                            " %s", remote, e.output)
+            output = e.output
+        if output and IFCONFIG_FAILED in output:
+            logging.warning("Could not capture ifconfig state on %r.", remote)
 
     try:
         remote.copy(directory, log_paths)
     except (subprocess.CalledProcessError,
             winrm.exceptions.WinRMTransportError) as e:
         # The juju logs will not exist if cloud-init failed.
-        logging.warning("Could not retrieve some or all logs:")
-        if getattr(e, 'output', None):
-            logging.warning(e.output)
-        else:
-            logging.warning(repr(e))
+        logging.warning("Could not retrieve some or all logs from %r: %s",
+                        remote, getattr(e, 'output', None) or repr(e))
 
 
 def assess_juju_run(client):
@@ -79,6 +79,12 @@ try:
 except NameError:
     argtype = str
 
+# Use the libyaml-backed loader when PyYAML was built with it.
+try:
+    from yaml import CSafeLoader as StatusLoader
+except ImportError:
+    from yaml import SafeLoader as StatusLoader
+
 AGENTS_READY = set(['started', 'idle'])
 WIN_JUJU_CMD = os.path.join('\\', 'Progra~2', 'Juju', 'juju.exe')
 
@@ -889,7 +895,7 @@ class Status:
             # parsing as JSON first and fall back to YAML.
             status_yaml = json.loads(text)
         except ValueError:
-            status_yaml = yaml.safe_load(text)
+            status_yaml = yaml.load(text, Loader=StatusLoader)
         return cls(status_yaml, text)
 
     @property
@@ -1229,7 +1235,7 @@ class Juju2Backend:
         # Keep track of commands and how long the take.
         command_time = CommandTime(command, args, env)
         with scoped_environ(env):
-            log.debug('Running juju with env: {}'.format(env))
+            log.debug('Running juju with env: %s', env)
             with self._check_timeouts():
                 rval = call_func(args, stderr=stderr)
         self.juju_timings.append(command_time)
@@ -1253,7 +1259,7 @@ class Juju2Backend:
     def juju_async(self, command, args, used_feature_flags,
                    juju_home, model=None, timeout=None):
         full_args = self.full_args(command, args, model, timeout)
-        log.info(' '.join(args))
+        log.info(' '.join(full_args))
         env = self.shell_environ(used_feature_flags, juju_home)
         # Mutate os.environ instead of supplying env parameter so Windows can
         # search env['PATH']
@@ -2133,7 +2139,7 @@ class ModelClient:
                     return self.get_juju_output(self._show_status, *args)
                 return self.status_class.from_text(
                     self.get_juju_output(
-                        self._show_status, '--format', 'yaml',
+                        self._show_status, '--format', 'json',
                         controller=controller).decode('utf-8'))
             except subprocess.CalledProcessError:
                 pass
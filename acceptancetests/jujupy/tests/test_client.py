@@ -1156,7 +1156,7 @@ class TestModelClient(ClientTest):
                           return_value=output_text) as gjo_mock:
             result = client.get_status()
         gjo_mock.assert_called_once_with(
-            'show-status', '--format', 'yaml', controller=False)
+            'show-status', '--format', 'json', controller=False)
         self.assertEqual(Status, type(result))
         self.assertEqual(['a', 'b', 'c'], result.status)
 
@@ -2376,7 +2376,7 @@ class TestModelClient(ClientTest):
                           return_value=value) as gjo_mock:
             client.wait_for_ha()
         gjo_mock.assert_called_once_with(
-            'show-status', '--format', 'yaml', controller=False)
+            'show-status', '--format', 'json', controller=False)
 
     def test_wait_for_ha_requires_controller_client(self):
         client = fake_juju_client()
@@ -3024,6 +3024,15 @@ class TestModelClient(ClientTest):
                 proc.wait.return_value = 0
         proc.wait.assert_called_once_with()
 
+    def test_juju_async_logs_full_command(self):
+        env = JujuData('qux')
+        client = ModelClient(env, None, '/foobar/baz')
+        with patch('subprocess.Popen') as popen_class_mock:
+            with client.juju_async('foo', 'bar'):
+                popen_class_mock.return_value.wait.return_value = 0
+        self.assertIn('INFO baz --show-log foo -m qux:qux bar\n',
+                      self.log_stream.getvalue())
+
     def test_juju_async_failure(self):
         env = JujuData('qux')
         client = ModelClient(env, None, '/foobar/baz')
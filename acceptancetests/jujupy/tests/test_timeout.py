@@ -1,6 +1,5 @@
 from argparse import Namespace
 from contextlib import contextmanager
-import datetime
 import random
 from signal import SIGTERM
 from unittest import TestCase
@@ -81,12 +80,12 @@ class TestRunCommand(TestCase):
             sleep_mock.mock_calls, [call(0.1), call(0.1)])
 
     def test_duration_elapsed(self):
-        start = datetime.datetime(2015, 1, 1)
-        middle = start + datetime.timedelta(seconds=57.4)
-        end = start + datetime.timedelta(seconds=57.6)
+        start = 1000
+        middle = start + 57.4
+        end = start + 57.6
         with self.patch_po() as (po_mock, poll_mock, sleep_mock):
             poll_mock.side_effect = [None, None, None, None]
-            with patch('utility.until_timeout.now') as utn_mock:
+            with patch('utility.until_timeout.clock') as utn_mock:
                 utn_mock.side_effect = [start, middle, end, end]
                 self.assertEqual(run_command(57.5, SIGTERM, ['ls', 'foo']),
                                  124)
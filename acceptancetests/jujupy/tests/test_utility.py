@@ -8,20 +8,25 @@ import os
 import socket
 
 from mock import (
+    Mock,
     patch,
     )
+import yaml
 
 from tests import (
     TestCase,
     )
 import jujupy.utility
 from jujupy.utility import (
+    check_free_disk_space,
+    get_mount_point,
     is_ipv6_address,
     quote,
     scoped_environ,
     skip_on_missing_file,
     split_address_port,
     temp_dir,
+    temp_yaml_file,
     until_timeout,
     unqualified_model_name,
     qualified_model_name,
@@ -31,40 +36,23 @@ from jujupy.utility import (
 class TestUntilTimeout(TestCase):
 
     def test_no_timeout(self):
-
-        iterator = until_timeout(0)
-
-        def now_iter():
-            yield iterator.start
-            yield iterator.start
-            assert False
-
-        with patch.object(iterator, 'now', lambda: next(now_iter())):
-            for x in iterator:
-                self.assertIs(None, x)
-                break
+        with patch('utility.until_timeout.clock', return_value=10):
+            self.assertEqual([], list(until_timeout(0)))
 
     @contextmanager
-    def patched_until(self, timeout, deltas):
-        iterator = until_timeout(timeout)
-
-        def now_iter():
-            for d in deltas:
-                yield iterator.start + d
-            assert False
-        now_iter_i = now_iter()
-        with patch.object(iterator, 'now', lambda: next(now_iter_i)):
-            yield iterator
+    def patched_until(self, timeout, elapsed):
+        clock_iter = iter([100] + [100 + e for e in elapsed])
+        with patch('utility.until_timeout.clock',
+                   side_effect=lambda: next(clock_iter)):
+            yield until_timeout(timeout)
 
     def test_timeout(self):
-        with self.patched_until(
-                5, [timedelta(), timedelta(0, 4), timedelta(0, 5)]) as until:
+        with self.patched_until(5, [0, 4, 5]) as until:
             results = list(until)
         self.assertEqual([5, 1], results)
 
     def test_long_timeout(self):
-        deltas = [timedelta(), timedelta(4, 0), timedelta(5, 0)]
-        with self.patched_until(86400 * 5, deltas) as until:
+        with self.patched_until(86400 * 5, [0, 86400 * 4, 86400 * 5]) as until:
             self.assertEqual([86400 * 5, 86400], list(until))
 
     def test_start(self):
@@ -74,6 +62,29 @@ class TestUntilTimeout(TestCase):
                    side_effect=lambda: next(now_iter)):
             self.assertEqual(list(until_timeout(10, now - timedelta(10))), [])
 
+    def test_start_elapsed_deducted(self):
+        now = datetime.now()
+        with patch('utility.until_timeout.now', return_value=now):
+            with patch('utility.until_timeout.clock', return_value=100):
+                until = until_timeout(10, now - timedelta(seconds=3))
+                self.assertEqual(7, next(until))
+
+    def test_wall_clock_not_used_without_start(self):
+        with patch('utility.until_timeout.now',
+                   side_effect=AssertionError('wall clock used')):
+            with self.patched_until(5, [1]) as until:
+                self.assertEqual(4, next(until))
+
+
+class TestTempYamlFile(TestCase):
+
+    def test_temp_yaml_file(self):
+        bundle = {'services': {'dummy-source': {'num_units': 1}}}
+        with temp_yaml_file(bundle) as yaml_file:
+            with open(yaml_file) as f:
+                self.assertEqual(bundle, yaml.safe_load(f))
+        self.assertFalse(os.path.exists(yaml_file))
+
 
 class TestIsIPv6Address(TestCase):
 
@@ -112,6 +123,11 @@ class TestSplitAddressPort(TestCase):
         self.assertEqual(
             ("2001:db8::7", "17017"), split_address_port("2001:db8::7:17017"))
 
+    def test_ipv6_literal(self):
+        self.assertEqual(
+            ("2001:db8::7", "17017"),
+            split_address_port("[2001:db8::7]:17017"))
+
 
 class TestSkipOnMissingFile(TestCase):
 
@@ -188,6 +204,48 @@ class TestTempDir(TestCase):
         self.assertFalse(os.path.exists(p))
 
 
+class TestGetMountPoint(TestCase):
+
+    def test_root(self):
+        self.assertEqual('/', get_mount_point('/'))
+
+    def test_walks_up_to_mount(self):
+        mounts = set(['/', '/srv'])
+        with patch('os.path.realpath', side_effect=lambda p: p):
+            with patch('os.path.ismount', side_effect=mounts.__contains__):
+                self.assertEqual('/srv', get_mount_point('/srv/juju/db'))
+                self.assertEqual('/', get_mount_point('/var/lib/juju'))
+
+
+class TestCheckFreeDiskSpace(TestCase):
+
+    def check(self, bavail, required):
+        fs_stats = Mock(f_bavail=bavail, f_frsize=4096)
+        with patch('os.statvfs', autospec=True,
+                   return_value=fs_stats) as sv_mock:
+            with patch('jujupy.utility.get_mount_point', autospec=True,
+                       return_value='/srv') as gmp_mock:
+                with patch('sys.stdout') as stdout_mock:
+                    check_free_disk_space('/srv/juju', required, 'Juju')
+        sv_mock.assert_called_once_with('/srv/juju')
+        output = ''.join(c[0][0] for c in stdout_mock.write.call_args_list)
+        return output, gmp_mock
+
+    def test_enough_space(self):
+        output, gmp_mock = self.check(2048, 8192)
+        self.assertEqual('', output)
+        self.assertEqual(0, gmp_mock.call_count)
+
+    def test_not_enough_space(self):
+        output, gmp_mock = self.check(2048, 8193)
+        self.assertEqual(
+            'Warning: Probably not enough disk space available for\n'
+            'Juju in directory /srv/juju,\n'
+            'mount point /srv\n'
+            'required: 8193kB, available: 8192kB.\n', output)
+        gmp_mock.assert_called_once_with('/srv/juju')
+
+
 class TestUnqualifiedModelName(TestCase):
 
     def test_returns_just_model_name_when_passed_qualifed_full_username(self):
@@ -762,7 +762,7 @@ class TestEnvJujuClient1X(ClientTest):
                           return_value=output_text) as gjo_mock:
             result = client.get_status()
         gjo_mock.assert_called_once_with(
-            'status', '--format', 'yaml', controller=False)
+            'status', '--format', 'json', controller=False)
         self.assertEqual(Status1X, type(result))
         self.assertEqual(['a', 'b', 'c'], result.status)
 
@@ -818,7 +818,7 @@ class TestEnvJujuClient1X(ClientTest):
                           return_value=output_text) as gjo_mock:
             client.get_status(controller=True)
         gjo_mock.assert_called_once_with(
-            'status', '--format', 'yaml', controller=True)
+            'status', '--format', 'json', controller=True)
 
     @staticmethod
     def make_status_yaml(key, machine_value, unit_value):
@@ -20,9 +20,7 @@ from datetime import (
     )
 import errno
 import os
-import re
 from shutil import rmtree
-import subprocess
 import socket
 import sys
 from time import (
@@ -37,7 +35,17 @@ try:
     from shlex import quote
 except ImportError:
     from pipes import quote
+# Python 2 has no monotonic clock in the standard library.
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
 import yaml
+# Use the libyaml-backed dumper when PyYAML was built with it.
+try:
+    from yaml import CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeDumper
 
 quote
 
@@ -63,13 +71,20 @@ class until_timeout:
 
     """Yields remaining number of seconds.  Stops when timeout is reached.
 
+    Time is measured with a monotonic clock, so changes to the system clock
+    do not shorten or extend the wait.  If start (a datetime) is supplied, the
+    time already elapsed since start is deducted from the timeout.
+
     :ivar timeout: Number of seconds to wait.
     """
     def __init__(self, timeout, start=None):
         self.timeout = timeout
-        if start is None:
-            start = self.now()
         self.start = start
+        if start is None:
+            elapsed = 0
+        else:
+            elapsed = (self.now() - start).total_seconds()
+        self.deadline = self.clock() + timeout - elapsed
 
     def __iter__(self):
         return self
@@ -78,12 +93,15 @@ class until_timeout:
     def now():
         return datetime.now()
 
+    @staticmethod
+    def clock():
+        return monotonic()
+
     def __next__(self):
         return self.next()
 
     def next(self):
-        elapsed = self.now() - self.start
-        remaining = self.timeout - elapsed.total_seconds()
+        remaining = self.deadline - self.clock()
         if remaining <= 0:
             raise StopIteration
         return remaining
@@ -118,12 +136,11 @@ def split_address_port(address_port):
     ipv6 addresses must be in the literal form with a port ([::12af]:80).
     ipv4 addresses may be without a port, which translates to None.
     """
-    if ':' not in address_port:
+    address, sep, port = address_port.rpartition(':')
+    if not sep:
         # This is correct for ipv4.
         return address_port, None
-    address, port = address_port.rsplit(':', 1)
-    address = address.strip('[]')
-    return address, port
+    return address.strip('[]'), port
 
 
 def print_now(string):
@@ -141,11 +158,18 @@ def temp_dir(parent=None, keep=False):
             rmtree(directory)
 
 
+def get_mount_point(path):
+    """Return the mount point of the file system containing path."""
+    path = os.path.realpath(path)
+    while not os.path.ismount(path):
+        path = os.path.dirname(path)
+    return path
+
+
 def check_free_disk_space(path, required, purpose):
-    df_result = subprocess.check_output(["df", "-k", path])
-    df_result = df_result.split('\n')[1]
-    df_result = re.split(' +', df_result)
-    available = int(df_result[3])
+    """Warn if less than required kB are available to users at path."""
+    fs_stats = os.statvfs(path)
+    available = fs_stats.f_bavail * fs_stats.f_frsize // 1024
     if available < required:
         message = (
             "Warning: Probably not enough disk space available for\n"
@@ -154,7 +178,8 @@ def check_free_disk_space(path, required, purpose):
             "required: %(required)skB, available: %(available)skB."
             )
         print(message % {
-            'path': path, 'mount': df_result[5], 'required': required,
+            'path': path, 'mount': get_mount_point(path),
+            'required': required,
             'available': available, 'purpose': purpose
             })
 
@@ -187,7 +212,8 @@ def temp_yaml_file(yaml_dict, encoding="utf-8"):
     temp_file_cxt = NamedTemporaryFile(suffix='.yaml', delete=False)
     try:
         with temp_file_cxt as temp_file:
-            yaml.safe_dump(yaml_dict, temp_file, encoding=encoding)
+            yaml.dump(yaml_dict, temp_file, Dumper=SafeDumper,
+                      encoding=encoding)
         yield temp_file.name
     finally:
         os.unlink(temp_file.name)
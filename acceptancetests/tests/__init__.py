@@ -209,8 +209,9 @@ def observable_temp_file():
             @contextmanager
             def nt():
                 # This is used to prevent NamedTemporaryFile.close from being
-                # called.
+                # called.  Flush instead, as closing would.
                 yield temporary_file
+                temporary_file.flush()
 
             with patch('jujupy.utility.NamedTemporaryFile',
                        return_value=nt()):
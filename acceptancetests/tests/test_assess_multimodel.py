@@ -5,12 +5,14 @@ from contextlib import contextmanager
 import os
 
 from mock import (
+    call,
     Mock,
     patch,
     )
 
 from assess_multimodel import (
     assess_destroy_current,
+    assess_multimodel_deploy,
     check_services,
     env_token,
     hosted_environment,
@@ -132,6 +134,40 @@ class TestMultiModel(tests.FakeHomeTestCase):
                     self.assertEqual(1, client.enable_jes.call_count)
 
 
+class TestAssessMultimodelDeploy(tests.TestCase):
+
+    def test_deploys_all_before_waiting(self):
+        client, env1_client, env2_client = Mock(), Mock(), Mock()
+        hosted_clients = {'env1': env1_client, 'env2': env2_client}
+
+        @contextmanager
+        def hosted_stub(system_client, log_dir, suffix):
+            yield hosted_clients[suffix]
+
+        # Record the order through plain mocks: calls on autospecced mocks
+        # are not recorded on a parent by attach_mock before mock 4.
+        manager = Mock()
+        with patch_local('deploy_dummy_stack', side_effect=manager.deploy):
+            with patch_local('wait_for_dummy_stack',
+                             side_effect=manager.wait):
+                with patch_local('check_services', side_effect=manager.check):
+                    with patch_local('hosted_environment',
+                                     side_effect=hosted_stub):
+                        assess_multimodel_deploy(
+                            client, 'trusty', 'log/dir', 'baz')
+        self.assertEqual(manager.mock_calls, [
+            call.deploy(client, 'trusty', wait=False, use_bundle=True),
+            call.deploy(env1_client, 'trusty', wait=False, use_bundle=True),
+            call.deploy(env2_client, 'trusty', wait=False, use_bundle=True),
+            call.wait(client),
+            call.wait(env1_client),
+            call.wait(env2_client),
+            call.check(client),
+            call.check(env1_client),
+            call.check(env2_client),
+            ])
+
+
 class TestDestroyCurrent(tests.TestCase):
 
     @contextmanager
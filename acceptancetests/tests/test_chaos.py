@@ -99,7 +99,7 @@ class TestRunChaosMonkey(FakeHomeTestCase):
                 }
             })
             output = {
-                ('show-status', '--format', 'yaml'): status,
+                ('show-status', '--format', 'json'): status,
                 }
             return output[args]
         client = ModelClient(JujuData('foo', {}), '1.25.0', '/foo/juju')
@@ -148,7 +148,7 @@ class TestRunChaosMonkey(FakeHomeTestCase):
                 }
             })
             output = {
-                ('show-status', '--format', 'yaml'): status,
+                ('show-status', '--format', 'json'): status,
                 }
             return output[args]
         client = ModelClient(JujuData('foo', {}), None, '/foo/juju')
@@ -267,7 +267,7 @@ class TestUnleashOnce(FakeHomeTestCase):
                 }
             })
             output = {
-                ('show-status', '--format', 'yaml'): status,
+                ('show-status', '--format', 'json'): status,
                 ('get', 'jenkins'): charm_config,
                 ('run-action', 'chaos-monkey/0', 'start', 'mode=single',
                  'enablement-timeout=120'
@@ -308,7 +308,7 @@ class TestUnleashOnce(FakeHomeTestCase):
                 }
             })
             output = {
-                ('show-status', '--format', 'yaml'): status,
+                ('show-status', '--format', 'json'): status,
                 ('run-action', 'chaos-monkey/1', 'start', 'mode=single',
                  'enablement-timeout=120',
                  'monkey-id=123412341234123412341234123412341234'
@@ -324,7 +324,7 @@ class TestUnleashOnce(FakeHomeTestCase):
         expected = ['abcd' * 9, '1234' * 9]
         self.assertEqual(
             [
-                call('show-status', '--format', 'yaml', controller=False),
+                call('show-status', '--format', 'json', controller=False),
                 call('run-action', 'chaos-monkey/1', 'start', 'mode=single',
                      'enablement-timeout=120'),
                 call('run-action', 'chaos-monkey/0', 'start', 'mode=single',
@@ -340,7 +340,7 @@ class TestUnleashOnce(FakeHomeTestCase):
             monkey_runner.unleash_once()
         self.assertEqual(
             [
-                call('show-status', '--format', 'yaml', controller=False),
+                call('show-status', '--format', 'json', controller=False),
                 call('run-action',
                      'chaos-monkey/1', 'start', 'mode=single',
                      'enablement-timeout=120',
@@ -379,7 +379,7 @@ class TestUnleashOnce(FakeHomeTestCase):
                 }
             })
             output = {
-                ('show-status', '--format', 'yaml'): status,
+                ('show-status', '--format', 'json'): status,
                 ('run-action', 'chaos-monkey/0', 'start', 'mode=single',
                  'enablement-timeout=120'
                  ): 'Action fail',
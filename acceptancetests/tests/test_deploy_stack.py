@@ -32,8 +32,10 @@ from deploy_stack import (
     boot_context,
     BootstrapManager,
     check_token,
+    compress_logs,
     copy_local_logs,
     copy_remote_logs,
+    copy_remote_logs_concurrently,
     CreateController,
     ExistingController,
     deploy_dummy_stack,
@@ -44,6 +46,8 @@ from deploy_stack import (
     dump_env_logs,
     dump_juju_timings,
     _get_clients_to_upgrade,
+    is_log,
+    iter_log_files,
     iter_remote_machines,
     get_remote_machines,
     make_controller_strategy,
@@ -51,6 +55,7 @@ from deploy_stack import (
     safe_print_status,
     retain_config,
     update_env,
+    wait_for_dummy_stack,
     wait_for_state_server_to_shutdown,
     error_if_unclean,
     test_on_controller
@@ -564,12 +569,26 @@ class DumpEnvLogsTestCase(FakeHomeTestCase):
             ['INFO Retrieving logs for local environment'],
             self.log_stream.getvalue().splitlines())
 
+    def test_is_log(self):
+        self.assertTrue(is_log('machine-0.log'))
+        self.assertTrue(is_log('syslog'))
+        self.assertFalse(is_log('syslog.1'))
+        self.assertFalse(is_log('interfaces'))
+
+    @contextmanager
+    def no_pigz(self, cores=1):
+        with patch('deploy_stack.which', autospec=True, return_value=None):
+            with patch('deploy_stack.cpu_count', autospec=True,
+                       return_value=cores):
+                yield
+
     def test_archive_logs(self):
         with temp_dir() as log_dir:
             with open(os.path.join(log_dir, 'fake.log'), 'w') as f:
                 f.write('log contents')
             with patch('subprocess.check_call', autospec=True) as cc_mock:
-                archive_logs(log_dir)
+                with self.no_pigz():
+                    archive_logs(log_dir)
             log_path = os.path.join(log_dir, 'fake.log')
             cc_mock.assert_called_once_with(['gzip', '--best', '-f', log_path])
 
@@ -579,7 +598,8 @@ class DumpEnvLogsTestCase(FakeHomeTestCase):
             with open(log_path, 'w') as f:
                 f.write('syslog contents')
             with patch('subprocess.check_call', autospec=True) as cc_mock:
-                archive_logs(log_dir)
+                with self.no_pigz():
+                    archive_logs(log_dir)
             cc_mock.assert_called_once_with(['gzip', '--best', '-f', log_path])
 
     def test_archive_logs_subdir(self):
@@ -589,14 +609,16 @@ class DumpEnvLogsTestCase(FakeHomeTestCase):
             with open(os.path.join(subdir, 'fake.log'), 'w') as f:
                 f.write('log contents')
             with patch('subprocess.check_call', autospec=True) as cc_mock:
-                archive_logs(log_dir)
+                with self.no_pigz():
+                    archive_logs(log_dir)
             log_path = os.path.join(subdir, 'fake.log')
             cc_mock.assert_called_once_with(['gzip', '--best', '-f', log_path])
 
     def test_archive_logs_none(self):
         with temp_dir() as log_dir:
             with patch('subprocess.check_call', autospec=True) as cc_mock:
-                archive_logs(log_dir)
+                with self.no_pigz():
+                    archive_logs(log_dir)
         self.assertEquals(cc_mock.call_count, 0)
 
     def test_archive_logs_multiple(self):
@@ -611,7 +633,8 @@ class DumpEnvLogsTestCase(FakeHomeTestCase):
                 f.write('syslog contents')
             log_paths.append(os.path.join(subdir, 'syslog'))
             with patch('subprocess.check_call', autospec=True) as cc_mock:
-                archive_logs(log_dir)
+                with self.no_pigz():
+                    archive_logs(log_dir)
             self.assertEqual(1, cc_mock.call_count)
             call_args, call_kwargs = cc_mock.call_args
             gzip_args = call_args[0]
@@ -619,6 +642,76 @@ class DumpEnvLogsTestCase(FakeHomeTestCase):
             self.assertEqual(gzip_args[:3], ['gzip', '--best', '-f'])
             self.assertEqual(set(gzip_args[3:]), set(log_paths))
 
+    def test_archive_logs_ignores_symlinked_dirs(self):
+        with temp_dir() as log_dir:
+            with temp_dir() as other_dir:
+                with open(os.path.join(other_dir, 'fake.log'), 'w') as f:
+                    f.write('log contents')
+                os.symlink(other_dir, os.path.join(log_dir, 'linked'))
+                with patch('subprocess.check_call', autospec=True) as cc_mock:
+                    with self.no_pigz():
+                        archive_logs(log_dir)
+        self.assertEqual(0, cc_mock.call_count)
+
+    def test_iter_log_files(self):
+        with temp_dir() as log_dir:
+            subdir = os.path.join(log_dir, 'subdir')
+            os.mkdir(subdir)
+            for path in [os.path.join(log_dir, 'machine-0.log'),
+                         os.path.join(log_dir, 'notes.txt'),
+                         os.path.join(subdir, 'syslog')]:
+                open(path, 'w').close()
+            self.assertItemsEqual(
+                [os.path.join(log_dir, 'machine-0.log'),
+                 os.path.join(subdir, 'syslog')],
+                iter_log_files(log_dir))
+
+    def test_iter_log_files_symlinked_dir_named_log(self):
+        with temp_dir() as log_dir:
+            with temp_dir() as other_dir:
+                open(os.path.join(other_dir, 'fake.log'), 'w').close()
+                os.symlink(other_dir, os.path.join(log_dir, 'old.log'))
+                self.assertEqual([], list(iter_log_files(log_dir)))
+
+    def test_compress_logs_pigz(self):
+        with patch('deploy_stack.which', autospec=True,
+                   return_value='/usr/bin/pigz') as which_mock:
+            with patch('deploy_stack.cpu_count', autospec=True,
+                       return_value=8):
+                with patch('subprocess.check_call',
+                           autospec=True) as cc_mock:
+                    compress_logs(['a.log', 'b.log'])
+        which_mock.assert_called_once_with('pigz')
+        cc_mock.assert_called_once_with(
+            ['pigz', '--best', '-f', '-p', '8', 'a.log', 'b.log'])
+
+    def test_compress_logs_concurrent_gzip(self):
+        log_files = ['a.log', 'b.log', 'c.log', 'd.log', 'e.log']
+        with self.no_pigz(cores=2):
+            with patch('subprocess.check_call', autospec=True) as cc_mock:
+                compress_logs(log_files)
+        self.assertItemsEqual([
+            call(['gzip', '--best', '-f', 'a.log', 'c.log', 'e.log']),
+            call(['gzip', '--best', '-f', 'b.log', 'd.log']),
+            ], cc_mock.call_args_list)
+
+    def test_compress_logs_more_cores_than_logs(self):
+        with self.no_pigz(cores=8):
+            with patch('subprocess.check_call', autospec=True) as cc_mock:
+                compress_logs(['a.log', 'b.log'])
+        self.assertItemsEqual([
+            call(['gzip', '--best', '-f', 'a.log']),
+            call(['gzip', '--best', '-f', 'b.log']),
+            ], cc_mock.call_args_list)
+
+    def test_compress_logs_error(self):
+        error = subprocess.CalledProcessError(1, 'gzip')
+        with self.no_pigz(cores=2):
+            with patch('subprocess.check_call', autospec=True,
+                       side_effect=error):
+                with self.assertRaises(subprocess.CalledProcessError):
+                    compress_logs(['a.log', 'b.log'])
+
     def test_copy_local_logs(self):
         # Relevent local log files are copied, after changing their permissions
         # to allow access by non-root user.
@@ -630,12 +723,17 @@ class DumpEnvLogsTestCase(FakeHomeTestCase):
             template_dir = os.path.join(juju_home_dir, "templates")
             os.mkdir(template_dir)
             open(os.path.join(template_dir, "container.log"), "w").close()
+            open(os.path.join(juju_home_dir, "a-local",
+                              "cloud-init-output.log"), "w").close()
+            dest_dir = os.path.join(juju_home_dir, "destination")
+            os.mkdir(dest_dir)
             with patch('deploy_stack.get_juju_home', autospec=True,
                        return_value=juju_home_dir):
                 with patch('deploy_stack.lxc_template_glob',
                            os.path.join(template_dir, "*.log")):
                     with patch('subprocess.check_call') as cc_mock:
-                        copy_local_logs(env, '/destination/dir')
+                        copy_local_logs(env, dest_dir)
+            copied = sorted(os.listdir(dest_dir))
         expected_files = [os.path.join(juju_home_dir, *p) for p in (
             ('a-local', 'cloud-init-output.log'),
             ('a-local', 'log', 'all-machines.log'),
@@ -643,24 +741,58 @@ class DumpEnvLogsTestCase(FakeHomeTestCase):
         )]
         self.assertEqual(cc_mock.call_args_list, [
             call(['sudo', 'chmod', 'go+r'] + expected_files),
-            call(['cp'] + expected_files + ['/destination/dir']),
         ])
+        self.assertEqual(
+            ['all-machines.log', 'cloud-init-output.log', 'container.log'],
+            copied)
+
+    def test_copy_local_logs_copies_remaining_on_copy_error(self):
+        env = SimpleEnvironment('a-local', {'type': 'local'})
+        with temp_dir() as juju_home_dir:
+            log_dir = os.path.join(juju_home_dir, "a-local", "log")
+            os.makedirs(log_dir)
+            open(os.path.join(log_dir, "all-machines.log"), "w").close()
+            dest_dir = os.path.join(juju_home_dir, "destination")
+            os.mkdir(dest_dir)
+            with patch('deploy_stack.get_juju_home', autospec=True,
+                       return_value=juju_home_dir):
+                with patch('deploy_stack.lxc_template_glob',
+                           os.path.join(juju_home_dir, "*.log")):
+                    with patch('subprocess.check_call', autospec=True):
+                        copy_local_logs(env, dest_dir)
+            copied = os.listdir(dest_dir)
+        self.assertEqual(['all-machines.log'], copied)
+        missing = os.path.join(juju_home_dir, 'a-local',
+                               'cloud-init-output.log')
+        lines = self.log_stream.getvalue().splitlines()
+        self.assertEqual(1, len(lines))
+        self.assertTrue(lines[0].startswith(
+            'WARNING Could not retrieve local log {}: '.format(missing)))
 
     def test_copy_local_logs_warns(self):
         env = SimpleEnvironment('a-local', {'type': 'local'})
-        err = subprocess.CalledProcessError(1, 'cp', None)
+        err = subprocess.CalledProcessError(1, 'sudo', None)
         with temp_dir() as juju_home_dir:
+            local_dir = os.path.join(juju_home_dir, "a-local")
+            os.mkdir(local_dir)
+            open(os.path.join(local_dir, "cloud-init-output.log"),
+                 "w").close()
+            dest_dir = os.path.join(juju_home_dir, "destination")
+            os.mkdir(dest_dir)
             with patch('deploy_stack.get_juju_home', autospec=True,
                        return_value=juju_home_dir):
                 with patch('deploy_stack.lxc_template_glob',
                            os.path.join(juju_home_dir, "*.log")):
                     with patch('subprocess.check_call', autospec=True,
                                side_effect=err):
-                        copy_local_logs(env, '/destination/dir')
-        self.assertEqual(
-            ["WARNING Could not retrieve local logs: Command 'cp' returned"
-             " non-zero exit status 1"],
-            self.log_stream.getvalue().splitlines())
+                        copy_local_logs(env, dest_dir)
+            copied = os.listdir(dest_dir)
+        self.assertEqual(['cloud-init-output.log'], copied)
+        lines = self.log_stream.getvalue().splitlines()
+        self.assertEqual(1, len(lines))
+        self.assertTrue(lines[0].startswith(
+            "WARNING Could not allow access to the local logs: Command 'sudo'"
+            " returned non-zero exit status 1"))
 
     def test_copy_remote_logs(self):
         # To get the logs, their permissions must be updated first,
@@ -677,6 +809,8 @@ class DumpEnvLogsTestCase(FakeHomeTestCase):
                 '-o', 'StrictHostKeyChecking no',
                 '-o', 'PasswordAuthentication no',
                 '10.10.0.1',
+                '{ ifconfig || ip addr; } > /home/ubuntu/ifconfig.log 2>&1'
+                ' || echo ifconfig-capture-failed; '
                 'sudo chmod -Rf go+r /var/log/cloud-init*.log'
                 ' /var/log/juju/*.log'
                 ' /var/lib/juju/containers/juju-*-lxc-*/'
@@ -689,16 +823,6 @@ class DumpEnvLogsTestCase(FakeHomeTestCase):
                 ' /home/ubuntu/ifconfig.log'
                 ),),
             cc_mock.call_args_list[0][0])
-        self.assertEqual(
-            (get_timeout_prefix(120) + (
-                'ssh',
-                '-o', 'User ubuntu',
-                '-o', 'UserKnownHostsFile /dev/null',
-                '-o', 'StrictHostKeyChecking no',
-                '-o', 'PasswordAuthentication no',
-                '10.10.0.1',
-                'ifconfig > /home/ubuntu/ifconfig.log'),),
-            cc_mock.call_args_list[1][0])
         self.assertEqual(
             (get_timeout_prefix(120) + (
                 'scp', '-rC',
@@ -717,7 +841,86 @@ class DumpEnvLogsTestCase(FakeHomeTestCase):
                 '10.10.0.1:/etc/environment',
                 '10.10.0.1:/home/ubuntu/ifconfig.log',
                 '/foo'),),
-            cc_mock.call_args_list[2][0])
+            cc_mock.call_args_list[1][0])
+        self.assertEqual(2, cc_mock.call_count)
+
+    def test_copy_remote_logs_ifconfig_failed(self):
+        remote = remote_from_address('10.10.0.1')
+        with patch('deploy_stack.wait_for_port', autospec=True):
+            with patch('subprocess.check_output', autospec=True,
+                       return_value=b'ifconfig-capture-failed\n'):
+                copy_remote_logs(remote, '/foo')
+        self.assertIn(
+            'WARNING Could not capture ifconfig state on {!r}.'.format(remote),
+            self.log_stream.getvalue().splitlines())
+
+    def test_copy_remote_logs_ifconfig_failed_and_chmod_failed(self):
+        remote = remote_from_address('10.10.0.1')
+
+        def remote_op(args, **kwargs):
+            if 'ssh' in args:
+                raise subprocess.CalledProcessError(
+                    1, 'ssh', b'ifconfig-capture-failed\n')
+
+        with patch('deploy_stack.wait_for_port', autospec=True):
+            with patch('subprocess.check_output', autospec=True,
+                       side_effect=remote_op):
+                copy_remote_logs(remote, '/foo')
+        self.assertIn(
+            'WARNING Could not capture ifconfig state on {!r}.'.format(remote),
+            self.log_stream.getvalue().splitlines())
+
+    def test_copy_remote_logs_concurrently(self):
+        jobs = [(self.r0, '/foo/machine-0'), (self.r1, '/foo/machine-1'),
+                (self.r2, '/foo/machine-2')]
+        with patch('deploy_stack.copy_remote_logs',
+                   autospec=True) as crl_mock:
+            copy_remote_logs_concurrently(jobs)
+        self.assertItemsEqual(
+            jobs, [cal[0] for cal in crl_mock.call_args_list])
+
+    def test_copy_remote_logs_concurrently_attributes_failures(self):
+        remotes = [remote_from_address('10.10.0.1'),
+                   remote_from_address('10.10.0.2')]
+
+        def remote_op(args, **kwargs):
+            host = [a for a in args if a.startswith('10.10.0.')][0]
+            output = 'no route to {}'.format(host.split(':')[0])
+            raise subprocess.CalledProcessError(
+                1, args[0], output.encode('ascii'))
+
+        with patch('subprocess.check_output', autospec=True,
+                   side_effect=remote_op):
+            with patch('deploy_stack.wait_for_port', autospec=True):
+                copy_remote_logs_concurrently(
+                    [(remotes[0], '/foo/machine-0'),
+                     (remotes[1], '/foo/machine-1')])
+        warnings = [line for line in self.log_stream.getvalue().splitlines()
+                    if line.startswith('WARNING')]
+        expected = []
+        for remote in remotes:
+            output = 'no route to {}'.format(remote.address).encode('ascii')
+            expected.extend([
+                'WARNING Could not allow access to the juju logs on {!r}:'
+                ' {}'.format(remote, output),
+                'WARNING Could not retrieve some or all logs from {!r}:'
+                ' {}'.format(remote, output),
+                ])
+        self.assertItemsEqual(expected, warnings)
+
+    def test_copy_remote_logs_concurrently_max_workers(self):
+        jobs = [(self.r0, '/foo/machine-0'), (self.r1, '/foo/machine-1'),
+                (self.r2, '/foo/machine-2')]
+        with patch('deploy_stack.ThreadPool', autospec=True) as tp_mock:
+            copy_remote_logs_concurrently(jobs, max_workers=2)
+            copy_remote_logs_concurrently(jobs[:1])
+        self.assertEqual([call(2), call(1)], tp_mock.call_args_list)
+        self.assertEqual(2, tp_mock.return_value.join.call_count)
+
+    def test_copy_remote_logs_concurrently_no_jobs(self):
+        with patch('deploy_stack.ThreadPool', autospec=True) as tp_mock:
+            copy_remote_logs_concurrently([])
+        self.assertEqual(0, tp_mock.call_count)
 
     def test_copy_remote_logs_windows(self):
         remote = remote_from_address('10.10.0.1', series="win2012hvr2")
@@ -738,14 +941,17 @@ class DumpEnvLogsTestCase(FakeHomeTestCase):
             else:
                 raise subprocess.CalledProcessError('scp error', 'output')
 
+        remote = remote_from_address('10.10.0.1')
         with patch('subprocess.check_output', side_effect=remote_op) as co:
             with patch('deploy_stack.wait_for_port', autospec=True):
-                copy_remote_logs(remote_from_address('10.10.0.1'), '/foo')
-        self.assertEqual(3, co.call_count)
+                copy_remote_logs(remote, '/foo')
+        self.assertEqual(2, co.call_count)
         self.assertEqual(
             ["DEBUG ssh -o 'User ubuntu' -o 'UserKnownHostsFile /dev/null' "
              "-o 'StrictHostKeyChecking no' -o 'PasswordAuthentication no' "
-             "10.10.0.1 'sudo chmod -Rf go+r /var/log/cloud-init*.log "
+             "10.10.0.1 '{ ifconfig || ip addr; } > /home/ubuntu/ifconfig.log"
+             " 2>&1 || echo ifconfig-capture-failed; "
+             "sudo chmod -Rf go+r /var/log/cloud-init*.log "
              "/var/log/juju/*.log /var/lib/juju/containers/juju-*-lxc-*/ "
              "/var/log/lxd/juju-* "
              "/var/log/lxd/lxd.log "
@@ -754,14 +960,10 @@ class DumpEnvLogsTestCase(FakeHomeTestCase):
              "/etc/network/interfaces "
              "/etc/environment "
              "/home/ubuntu/ifconfig.log'",
-             'WARNING Could not allow access to the juju logs:',
-             'WARNING None',
-             "DEBUG ssh -o 'User ubuntu' -o 'UserKnownHostsFile /dev/null' "
-             "-o 'StrictHostKeyChecking no' -o 'PasswordAuthentication no' "
-             "10.10.0.1 'ifconfig > /home/ubuntu/ifconfig.log'",
-             'WARNING Could not capture ifconfig state:',
-             'WARNING None', 'WARNING Could not retrieve some or all logs:',
-             'WARNING CalledProcessError()',
+             'WARNING Could not allow access to the juju logs on {!r}:'
+             ' None'.format(remote),
+             'WARNING Could not retrieve some or all logs from {!r}:'
+             ' CalledProcessError()'.format(remote),
              ],
             self.log_stream.getvalue().splitlines())
 
@@ -954,6 +1156,83 @@ class TestDeployDummyStack(FakeHomeTestCase):
             call('cs:~juju-qa/dummy-sink', series='xenial')]
         self.assertEqual(dp_mock.mock_calls, calls)
 
+    def test_deploy_dummy_stack_no_wait(self):
+        client = fake_juju_client()
+        client.bootstrap()
+        with patch.object(client, 'wait_for_started',
+                          autospec=True) as ws_mock:
+            deploy_dummy_stack(client, 'xenial', use_charmstore=True,
+                               wait=False)
+        self.assertEqual(ws_mock.call_count, 0)
+        status = client.get_status()
+        self.assertEqual(
+            ['dummy-sink', 'dummy-source'],
+            sorted(status.get_applications().keys()))
+
+    def test_deploy_dummy_stack_bundle(self):
+        client = fake_juju_client()
+        client.bootstrap()
+        bundles = []
+
+        def deploy_bundle(bundle_path):
+            with open(bundle_path) as bundle_file:
+                bundles.append(yaml.safe_load(bundle_file))
+
+        with patch.object(client, 'deploy_bundle', autospec=True,
+                          side_effect=deploy_bundle) as db_mock:
+            with patch.object(client, 'deploy', autospec=True) as dp_mock:
+                with patch.object(client, 'wait_for_started', autospec=True):
+                    deploy_dummy_stack(client, 'xenial', use_charmstore=True,
+                                       use_bundle=True)
+        self.assertEqual(db_mock.call_count, 1)
+        self.assertEqual(dp_mock.call_count, 0)
+        self.assertEqual(bundles, [{
+            'services': {
+                'dummy-source': {
+                    'charm': 'cs:~juju-qa/dummy-source',
+                    'series': 'xenial',
+                    'num_units': 1,
+                    },
+                'dummy-sink': {
+                    'charm': 'cs:~juju-qa/dummy-sink',
+                    'series': 'xenial',
+                    'num_units': 1,
+                    'expose': True,
+                    },
+                },
+            'relations': [['dummy-source', 'dummy-sink']],
+            }])
+
+    def test_deploy_dummy_stack_bundle_1x(self):
+        env = SimpleEnvironment('foo', {'type': 'nonlocal'})
+        client = EnvJujuClient1X(env, '1.25.0', '/foo/juju')
+        with patch.object(client, 'deploy_bundle', autospec=True) as db_mock:
+            with patch.object(client, 'deploy', autospec=True) as dp_mock:
+                with patch.object(client, 'juju', autospec=True):
+                    with patch.object(client, 'wait_for_started',
+                                      autospec=True):
+                        deploy_dummy_stack(client, 'xenial',
+                                           use_charmstore=True,
+                                           use_bundle=True)
+        self.assertEqual(db_mock.call_count, 0)
+        self.assertEqual(dp_mock.mock_calls, [
+            call('cs:~juju-qa/dummy-source', series='xenial'),
+            call('cs:~juju-qa/dummy-sink', series='xenial')])
+
+    def test_wait_for_dummy_stack(self):
+        client = fake_juju_client()
+        with patch.object(client, 'wait_for_started',
+                          autospec=True) as ws_mock:
+            wait_for_dummy_stack(client)
+        ws_mock.assert_called_once_with(3600)
+
+    def test_wait_for_dummy_stack_maas(self):
+        client = fake_juju_client(env=JujuData('foo', {'type': 'maas'}))
+        with patch.object(client, 'wait_for_started',
+                          autospec=True) as ws_mock:
+            wait_for_dummy_stack(client)
+        ws_mock.assert_called_once_with(7200)
+
     def test_deploy_dummy_stack(self):
         env = JujuData('foo', {'type': 'nonlocal'})
         client = ModelClient(env, '2.0.0', '/foo/juju')
@@ -969,7 +1248,7 @@ class TestDeployDummyStack(FakeHomeTestCase):
         def output(*args, **kwargs):
             token_file = '/var/run/dummy-sink/token'
             output = {
-                ('show-status', '--format', 'yaml'): status,
+                ('show-status', '--format', 'json'): status,
                 ('ssh', 'dummy-sink/0', 'cat', token_file): 'fake-token',
             }
             return output[args]
@@ -996,7 +1275,7 @@ class TestDeployDummyStack(FakeHomeTestCase):
         self.assertEqual(cc_mock.call_count, 4)
         self.assertEqual(
             [
-                call('show-status', '--format', 'yaml', controller=False)
+                call('show-status', '--format', 'json', controller=False)
             ],
             gjo_mock.call_args_list)
 
@@ -1211,10 +1490,10 @@ class TestTestUpgrade(FakeHomeTestCase):
         '--service', 'dummy-source,dummy-sink', 'uname')
     STATUS = (
         'juju', '--show-log', 'show-status', '-m', 'foo:foo',
-        '--format', 'yaml')
+        '--format', 'json')
     CONTROLLER_STATUS = (
         'juju', '--show-log', 'show-status', '-m', 'foo:controller',
-        '--format', 'yaml')
+        '--format', 'json')
     GET_ENV = ('juju', '--show-log', 'model-config', '-m', 'foo:foo',
                'agent-metadata-url')
     GET_CONTROLLER_ENV = (
@@ -6,9 +6,11 @@ from datetime import (
     datetime,
     timedelta,
     )
+import errno
 import json
 import logging
 import os
+import select
 import socket
 from tempfile import mkdtemp
 from time import time
@@ -34,6 +36,8 @@ from utility import (
     _find_candidates,
     find_candidates,
     find_latest_branch_candidates,
+    generate_default_clean_dir,
+    _get_test_name_from_filename,
     get_candidates_path,
     get_deb_arch,
     get_winrm_certs,
@@ -205,12 +209,113 @@ class TestWaitForPort(TestCase):
                     ('foo', 'bar', 'baz', 'qux', ('192.168.8.3', 27))
                     ]) as gai_mock:
             with patch('socket.socket') as socket_mock:
+                socket_mock.return_value.connect_ex.return_value = 0
                 wait_for_port('asdf', 26, closed=False)
         gai_mock.assert_called_once_with(
             'asdf', 26, socket.AF_INET, socket.SOCK_STREAM),
         socket_mock.assert_called_once_with('foo', 'bar', 'baz')
-        connect_mock = socket_mock.return_value.connect
-        connect_mock.assert_called_once_with(('192.168.8.3', 27))
+        conn = socket_mock.return_value
+        conn.setblocking.assert_called_once_with(0)
+        conn.connect_ex.assert_called_once_with(('192.168.8.3', 27))
+        conn.close.assert_called_once_with()
+
+    def test_wait_for_port_in_progress_open(self):
+        gai_result = [('foo', 'bar', 'baz', 'qux', ('192.168.8.3', 27))]
+        with patch('socket.getaddrinfo', autospec=True,
+                   return_value=gai_result):
+            with patch('socket.socket') as socket_mock:
+                conn = socket_mock.return_value
+                conn.connect_ex.return_value = errno.EINPROGRESS
+                conn.getsockopt.return_value = 0
+                with patch('select.poll') as poll_mock:
+                    poller = poll_mock.return_value
+                    poller.poll.return_value = [(3, select.POLLOUT)]
+                    wait_for_port('asdf', 26, closed=False, timeout=30)
+        poller.register.assert_called_once_with(conn, select.POLLOUT)
+        self.assertEqual(poller.poll.call_count, 1)
+        conn.getsockopt.assert_called_once_with(
+            socket.SOL_SOCKET, socket.SO_ERROR)
+
+    def test_wait_for_port_in_progress_refused_closed(self):
+        gai_result = [('foo', 'bar', 'baz', 'qux', ('192.168.8.3', 27))]
+        with patch('socket.getaddrinfo', autospec=True,
+                   return_value=gai_result):
+            with patch('socket.socket') as socket_mock:
+                conn = socket_mock.return_value
+                conn.connect_ex.return_value = errno.EINPROGRESS
+                conn.getsockopt.return_value = errno.ECONNREFUSED
+                with patch('select.poll') as poll_mock:
+                    poll_mock.return_value.poll.return_value = [
+                        (3, select.POLLOUT | select.POLLERR)]
+                    wait_for_port('asdf', 26, closed=True)
+        self.assertEqual(conn.connect_ex.call_count, 1)
+
+    def test_wait_for_port_in_progress_timeout_closed(self):
+        gai_result = [('foo', 'bar', 'baz', 'qux', ('192.168.8.3', 27))]
+        with patch('socket.getaddrinfo', autospec=True,
+                   return_value=gai_result):
+            with patch('socket.socket') as socket_mock:
+                conn = socket_mock.return_value
+                conn.connect_ex.return_value = errno.EINPROGRESS
+                with patch('select.poll') as poll_mock:
+                    poll_mock.return_value.poll.return_value = []
+                    wait_for_port('asdf', 26, closed=True)
+        self.assertEqual(conn.getsockopt.call_count, 0)
+
+    def test_wait_for_port_in_progress_select_without_poll(self):
+        gai_result = [('foo', 'bar', 'baz', 'qux', ('192.168.8.3', 27))]
+        with patch('socket.getaddrinfo', autospec=True,
+                   return_value=gai_result):
+            with patch('socket.socket') as socket_mock:
+                conn = socket_mock.return_value
+                conn.connect_ex.return_value = errno.EINPROGRESS
+                conn.getsockopt.return_value = 0
+                with patch('utility.select', spec=['select']) as select_mock:
+                    select_mock.select.return_value = ([], [conn], [])
+                    wait_for_port('asdf', 26, closed=False, timeout=30)
+        self.assertEqual(select_mock.select.call_count, 1)
+        self.assertEqual(select_mock.select.call_args[0][:3],
+                         ([], [conn], [conn]))
+        conn.getsockopt.assert_called_once_with(
+            socket.SOL_SOCKET, socket.SO_ERROR)
+
+    def test_wait_for_port_resolves_again_after_failure(self):
+        old_result = [('foo', 'bar', 'baz', 'qux', ('192.168.8.3', 27))]
+        new_result = [('foo', 'bar', 'baz', 'qux', ('192.168.8.4', 27))]
+        with patch('socket.getaddrinfo', autospec=True,
+                   side_effect=[old_result, new_result]) as gai_mock:
+            with patch('socket.socket') as socket_mock:
+                conn = socket_mock.return_value
+                conn.connect_ex.side_effect = [errno.ECONNREFUSED, 0]
+                wait_for_port('asdf', 26, closed=False)
+        self.assertEqual(gai_mock.call_count, 2)
+        self.assertEqual(conn.connect_ex.mock_calls, [
+            call(('192.168.8.3', 27)),
+            call(('192.168.8.4', 27)),
+            ])
+
+    def test_wait_for_port_closed_resolves_once_while_open(self):
+        gai_result = [('foo', 'bar', 'baz', 'qux', ('192.168.8.3', 27))]
+        with patch('socket.getaddrinfo', autospec=True,
+                   return_value=gai_result) as gai_mock:
+            with patch('socket.socket') as socket_mock:
+                socket_mock.return_value.connect_ex.side_effect = [
+                    0, 0, errno.ECONNREFUSED]
+                with patch('utility.sleep', autospec=True):
+                    wait_for_port('asdf', 26, closed=True)
+        self.assertEqual(gai_mock.call_count, 1)
+        self.assertEqual(socket_mock.call_count, 3)
+
+    def test_wait_for_port_unexpected_error(self):
+        gai_result = [('foo', 'bar', 'baz', 'qux', ('192.168.8.3', 27))]
+        with patch('socket.getaddrinfo', autospec=True,
+                   return_value=gai_result):
+            with patch('socket.socket') as socket_mock:
+                socket_mock.return_value.connect_ex.return_value = (
+                    errno.EACCES)
+                with self.assertRaises(socket.error) as ctx:
+                    wait_for_port('asdf', 26, closed=False)
+        self.assertEqual(ctx.exception.errno, errno.EACCES)
 
     def test_wait_for_port_no_address_closed(self):
         error = socket.gaierror(socket.EAI_NODATA, 'What address?')
@@ -248,11 +353,12 @@ class TestWaitForPort(TestCase):
         with patch('socket.getaddrinfo', autospec=True,
                    return_value=gai_result) as gai_mock:
             with patch('socket.socket') as socket_mock:
+                socket_mock.return_value.connect_ex.return_value = 0
                 wait_for_port('2001:db8::2', 22, closed=False)
         gai_mock.assert_called_once_with(
             '2001:db8::2', 22, socket.AF_INET6, socket.SOCK_STREAM)
         socket_mock.assert_called_once_with(23, 0, 0)
-        connect_mock = socket_mock.return_value.connect
+        connect_mock = socket_mock.return_value.connect_ex
         connect_mock.assert_called_once_with(('2001:db8::2', 22, 0, 0))
 
 
@@ -274,13 +380,55 @@ class TestGetDebArch(TestCase):
         self.assertEqual(arch, 'amd42')
 
 
+class TestGenerateDefaultCleanDir(TestCase):
+
+    def test_generate_default_clean_dir(self):
+        with patch('os.makedirs', autospec=True) as md_mock:
+            log_dir = generate_default_clean_dir('foo-20170101-temp-env')
+        md_mock.assert_called_once_with(log_dir)
+        self.assertEqual(
+            os.path.join('/tmp', 'foo', 'logs'), os.path.dirname(log_dir))
+
+    def test_generate_default_clean_dir_exists(self):
+        error = OSError(errno.EEXIST, 'File exists')
+        with patch('os.makedirs', autospec=True, side_effect=error):
+            log_dir = generate_default_clean_dir('foo-20170101-temp-env')
+        self.assertIn(
+            'WARNING Directory {} already exists'.format(log_dir),
+            self.log_stream.getvalue())
+
+    def test_generate_default_clean_dir_error(self):
+        error = OSError(errno.EACCES, 'Permission denied')
+        with patch('os.makedirs', autospec=True, side_effect=error):
+            with self.assertRaises(OSError) as ctx:
+                generate_default_clean_dir('foo-20170101-temp-env')
+        self.assertEqual(errno.EACCES, ctx.exception.errno)
+        self.assertIn('Failed to create logging directory: /tmp/foo/logs/',
+                      str(ctx.exception))
+
+
+class TestGetTestNameFromFilename(TestCase):
+
+    def test_get_test_name_from_filename(self):
+        main = Mock(__file__='/foo/assess_bar.py')
+        with patch.dict('sys.modules', {'__main__': main}):
+            self.assertEqual('assess_bar', _get_test_name_from_filename())
+
+    def test_get_test_name_from_filename_no_file(self):
+        main = Mock(spec=[])
+        with patch.dict('sys.modules', {'__main__': main}):
+            self.assertEqual('unknown_test', _get_test_name_from_filename())
+
+
 class TestAddBasicTestingArguments(TestCase):
 
     def test_no_args(self):
         cmd_line = []
         parser = add_basic_testing_arguments(ArgumentParser(),
                                              deadline=True)
-        args = parser.parse_args(cmd_line)
+        with patch('utility._get_test_name_from_filename', autospec=True,
+                   return_value='test_utility'):
+            args = parser.parse_args(cmd_line)
         self.assertEqual(args.env, 'lxd')
         self.assertEqual(args.juju_bin, None)
 
@@ -306,6 +454,24 @@ class TestAddBasicTestingArguments(TestCase):
             deadline=None, to=None, existing=None)
         self.assertEqual(args, expected)
 
+    def test_temp_env_name_generated_on_parse(self):
+        with patch('utility._generate_default_temp_env_name',
+                   autospec=True, return_value='foo-temp-env') as gen_mock:
+            parser = add_basic_testing_arguments(ArgumentParser())
+            self.assertEqual(0, gen_mock.call_count)
+            args = parser.parse_args([])
+        gen_mock.assert_called_once_with()
+        self.assertEqual('foo-temp-env', args.temp_env_name)
+
+    def test_temp_env_name_not_generated_when_given(self):
+        with patch('utility._generate_default_temp_env_name',
+                   autospec=True) as gen_mock:
+            parser = add_basic_testing_arguments(ArgumentParser())
+            args = parser.parse_args(['local', '/foo/juju', '/tmp/logs',
+                                      'testtest'])
+        self.assertEqual(0, gen_mock.call_count)
+        self.assertEqual('testtest', args.temp_env_name)
+
     def test_positional_args_add_juju_bin_name(self):
         cmd_line = ['local', '/juju', '/tmp/logs', 'testtest']
         parser = add_basic_testing_arguments(ArgumentParser(), deadline=True)
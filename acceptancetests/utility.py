@@ -8,6 +8,7 @@ import json
 import logging
 import os
 import re
+import select
 import subprocess
 import socket
 import sys
@@ -49,6 +50,14 @@ __all__ = [
 # <https://msdn.microsoft.com/ms740668#WSANO_DATA>
 WSANO_DATA = 11004
 
+# Values connect_ex may return for a non-blocking connect that has not yet
+# completed.  Windows reports WSAEWOULDBLOCK rather than EINPROGRESS.
+_CONNECT_IN_PROGRESS = frozenset([
+    errno.EINPROGRESS,
+    errno.EWOULDBLOCK,
+    getattr(errno, 'WSAEWOULDBLOCK', errno.EWOULDBLOCK),
+    ])
+
 
 @contextmanager
 def noop_context():
@@ -106,49 +115,81 @@ def as_literal_address(address):
     return address
 
 
+def _wait_for_connect(conn, timeout):
+    """Wait up to timeout seconds for a connect on conn to finish.
+
+    Return False if it did not finish in time.  poll is used where it is
+    available, because select cannot wait on descriptors at or above
+    FD_SETSIZE.  Windows only has select, and reports a failed connect as
+    an exceptional condition rather than as writable.
+    """
+    if hasattr(select, 'poll'):
+        poller = select.poll()
+        poller.register(conn, select.POLLOUT)
+        return bool(poller.poll(int(timeout * 1000)))
+    ignored, writable, failed = select.select([], [conn], [conn], timeout)
+    return bool(writable or failed)
+
+
+def _connect_error(conn, sockaddr, timeout):
+    """Attempt a non-blocking connect and return the resulting errno.
+
+    Rather than blocking in connect, wait for the connect to finish and read
+    the outcome from SO_ERROR.  An errno of 0 means the connection succeeded.
+    """
+    conn.setblocking(0)
+    err = conn.connect_ex(sockaddr)
+    if err in _CONNECT_IN_PROGRESS:
+        if not _wait_for_connect(conn, timeout):
+            return errno.ETIMEDOUT
+        err = conn.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+    return err
+
+
 def wait_for_port(host, port, closed=False, timeout=30):
     family = socket.AF_INET6 if is_ipv6_address(host) else socket.AF_INET
+    addrinfo = None
     for remaining in until_timeout(timeout):
-        try:
-            addrinfo = socket.getaddrinfo(host, port, family,
-                                          socket.SOCK_STREAM)
-        except socket.error as e:
-            if e.errno not in (socket.EAI_NODATA, WSANO_DATA):
-                raise
-            if closed:
-                return
-            else:
-                continue
+        if addrinfo is None:
+            try:
+                addrinfo = socket.getaddrinfo(host, port, family,
+                                              socket.SOCK_STREAM)
+            except socket.error as e:
+                if e.errno not in (socket.EAI_NODATA, WSANO_DATA):
+                    raise
+                if closed:
+                    return
+                else:
+                    continue
         sockaddr = addrinfo[0][4]
         # Treat Azure messed-up address lookup as a closed port.
         if sockaddr[0] == '0.0.0.0':
+            # Look the address up again next time round.
+            addrinfo = None
             if closed:
                 return
             else:
                 continue
         conn = socket.socket(*addrinfo[0][:3])
-        conn.settimeout(max(remaining or 0, 5))
         try:
-            conn.connect(sockaddr)
-        except socket.timeout:
-            if closed:
-                return
-        except socket.error as e:
-            if e.errno not in (errno.ECONNREFUSED, errno.ENETUNREACH,
-                               errno.ETIMEDOUT, errno.EHOSTUNREACH):
-                raise
-            if closed:
-                return
-        except socket.gaierror as e:
-            print_now(str(e))
+            err = _connect_error(conn, sockaddr, max(remaining or 0, 5))
         except Exception as e:
-            print_now('Unexpected {!r}: {}'.format((type(e), e)))
+            print_now('Unexpected {!r}: {}'.format(type(e), e))
             raise
-        else:
+        finally:
             conn.close()
+        if err == 0:
             if not closed:
                 return
             sleep(1)
+        elif err in (errno.ECONNREFUSED, errno.ENETUNREACH,
+                     errno.ETIMEDOUT, errno.EHOSTUNREACH):
+            if closed:
+                return
+            # The machine may have been given a new address.
+            addrinfo = None
+        else:
+            raise socket.error(err, os.strerror(err))
     raise PortTimeoutError('Timed out waiting for port.')
 
 
@@ -201,11 +242,11 @@ def s3_cmd(params, drop_output=False):
 
 
 def _get_test_name_from_filename():
-    try:
-        calling_file = sys._getframe(2).f_back.f_globals['__file__']
-        return os.path.splitext(os.path.basename(calling_file))[0]
-    except:
+    """Return the name of the script being run, without its extension."""
+    main_file = getattr(sys.modules.get('__main__'), '__file__', None)
+    if main_file is None:
         return 'unknown_test'
+    return os.path.splitext(os.path.basename(main_file))[0]
 
 
 def generate_default_clean_dir(temp_env_name):
@@ -219,23 +260,32 @@ def generate_default_clean_dir(temp_env_name):
         os.makedirs(log_dir)
         logging.info('Created logging directory {}'.format(log_dir))
     except OSError as e:
-        if e.errno == errno.EEXIST:
-            logging.warn('"Directory {} already exists'.format(log_dir))
-        else:
-            raise('Failed to create logging directory: {} ' +
-                  log_dir +
-                  '. Please specify empty folder or try again')
+        if e.errno != errno.EEXIST:
+            raise OSError(
+                e.errno,
+                'Failed to create logging directory: {}. Please specify'
+                ' empty folder or try again'.format(log_dir))
+        logging.warning('Directory {} already exists'.format(log_dir))
     return log_dir
 
 
+_NON_ALPHA_RE = re.compile('[^a-zA-Z]')
+
+
 def _generate_default_temp_env_name():
     """Creates a new unique name for environment and returns the name"""
     # we need to sanitize the name
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    test_name = re.sub('[^a-zA-Z]', '', _get_test_name_from_filename())
+    test_name = _NON_ALPHA_RE.sub('', _get_test_name_from_filename())
     return '{}-{}-temp-env'.format(test_name, timestamp)
 
 
+def _temp_env_name(value):
+    # Generate the default name when arguments are parsed rather than when
+    # the parser is built, so it is skipped when a name is given.
+    return value or _generate_default_temp_env_name()
+
+
 def _to_deadline(timeout):
     return datetime.utcnow() + timedelta(seconds=int(timeout))
 
@@ -289,7 +339,7 @@ def add_basic_testing_arguments(parser, using_jes=False, deadline=True,
                         ' this will generate an enviroment name using the '
                         ' timestamp and testname. '
                         ' test_name_timestamp_temp_env',
-                        default=_generate_default_temp_env_name())
+                        type=_temp_env_name, default='')
 
     # Optional keyword arguments.
     parser.add_argument('--debug', action='store_true',